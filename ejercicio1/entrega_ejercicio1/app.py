@@ -1,24 +1,103 @@
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import MutableHeaders
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import bindparam, func, select
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.backends.redis import RedisBackend
+from fastapi_cache.decorator import cache
+from redis import asyncio as aioredis
+from contextlib import asynccontextmanager
+from collections import defaultdict
 from typing import Optional
+import hashlib
 import logging
+import os
 import uvicorn
 import init_db
 
-from models import Country, get_session, create_database
+from models import Country, Language, country_language, get_session, create_database, warm_up_pool
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Configuración de caché de respuestas
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_PREFIX = "countries"
+CACHE_EXPIRE_SECONDS = 3600
+
+# Backend en memoria por defecto; se reemplaza por Redis al arrancar si REDIS_URL está definido
+FastAPICache.init(InMemoryBackend(), prefix=CACHE_PREFIX)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # El engine y su pool se crean antes de aceptar requests
+    warm_up_pool(create_database())
+    if REDIS_URL:
+        redis = aioredis.from_url(REDIS_URL)
+        FastAPICache.init(RedisBackend(redis), prefix=CACHE_PREFIX)
+        logger.info("Caché de respuestas usando Redis")
+    yield
+
 app = FastAPI(
     title="Countries API",
     description="API que consume datos de RESTCountries y los persiste localmente",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # Serialización de respuestas con orjson (implementado en Rust), más rápida que json estándar
+    default_response_class=ORJSONResponse
 )
 
-# Dependency para obtener la sesión de DB
+# Endpoints cuyas respuestas llevan ETag
+ETAG_PATHS = frozenset({"/countries", "/countries/stats"})
+
+def etag_matches(if_none_match, etag):
+    """Indica si el header If-None-Match del cliente incluye el ETag actual"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+@app.middleware("http")
+async def countries_etag_middleware(request: Request, call_next):
+    """
+    Añade un ETag fuerte (hash del cuerpo) a los GET de /countries y /countries/stats y responde 304 sin cuerpo
+    cuando el cliente ya tiene esa versión. Al derivarse del contenido, el ETag es el mismo
+    en todos los workers y reemplaza al que genera fastapi-cache2.
+    El endpoint se ejecuta igual (normalmente desde la caché de respuestas) y el cuerpo se lee y
+    se hashea antes de poder responder 304: un request condicional ahorra ancho de banda, no trabajo
+    del servidor.
+    """
+    response = await call_next(request)
+    if request.method != "GET" or request.url.path not in ETAG_PATHS or response.status_code != 200:
+        return response
+    
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    # Para validar la caché basta un hash rápido de 128 bits; no hace falta uno criptográfico largo
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    # Copia de los headers crudos: conserva los repetidos (p. ej. varios Set-Cookie)
+    headers = MutableHeaders(raw=list(response.headers.raw))
+    headers["etag"] = etag
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        not_modified_headers = {key: value for key, value in headers.items() if key in ("etag", "cache-control")}
+        return Response(status_code=304, headers=not_modified_headers)
+    return Response(content=body, status_code=response.status_code, headers=headers, media_type=response.media_type)
+
+def query_params_key_builder(func, namespace="", *, request=None, response=None, args=(), kwargs=None):
+    """
+    Construye la clave de caché sólo con los query params del endpoint.
+    Se excluye la sesión de DB, que cambia en cada request y haría fallar siempre la caché.
+    """
+    params = sorted((k, v) for k, v in (kwargs or {}).items() if k != "db")
+    raw_key = f"{func.__module__}:{func.__name__}:{params}"
+    return f"{namespace}:{hashlib.md5(raw_key.encode()).hexdigest()}"
+
+# Dependency para obtener la sesión de DB.
+# La sesión es síncrona, por eso los endpoints que consultan la DB se declaran con `def`:
+# FastAPI los ejecuta en su threadpool y las consultas no bloquean el event loop.
 def get_db():
     db = get_session()
     try:
@@ -42,8 +121,47 @@ async def root():
 #                      Filter countries by region
 # =============================================================================
 
+# Columnas que se devuelven por país, en el mismo orden que Country.to_dict()
+COUNTRY_COLUMNS = (
+    Country.country_id,
+    Country.name,
+    Country.region,
+    Country.population,
+    Country.area,
+    Country.alpha3_code,
+    Country.capital,
+    Country.subregion
+)
+
+# Sentencias construidas una sola vez; la región llega como parámetro enlazado en cada request
+ALL_COUNTRIES_STMT = select(*COUNTRY_COLUMNS)
+COUNTRIES_BY_REGION_STMT = ALL_COUNTRIES_STMT.where(func.lower(Country.region) == bindparam("region"))
+
+def get_languages_by_country(db, country_ids):
+    """Obtiene en una sola consulta los idiomas de los países indicados, agrupados por country_id"""
+    rows = db.query(
+        country_language.c.country_id,
+        Language.language_id,
+        Language.iso639_1,
+        Language.name,
+        Language.native_name
+    ).join(
+        Language, Language.language_id == country_language.c.language_id
+    ).filter(country_language.c.country_id.in_(country_ids))
+    
+    languages_by_country = defaultdict(list)
+    for row in rows:
+        languages_by_country[row.country_id].append({
+            "language_id": row.language_id,
+            "iso639_1": row.iso639_1,
+            "name": row.name,
+            "native_name": row.native_name
+        })
+    return languages_by_country
+
 @app.get("/countries")
-async def get_countries(
+@cache(expire=CACHE_EXPIRE_SECONDS, key_builder=query_params_key_builder)
+def get_countries(
     region: Optional[str] = Query(None, description="Filtrar por región"),
     db: Session = Depends(get_db)
 ):
@@ -52,13 +170,11 @@ async def get_countries(
     Implementa paginación para manejar grandes volúmenes de datos.
     """
     try:
-        query = db.query(Country)
-        
-        # Filtrar por región si se especifica
+        # Se seleccionan sólo las columnas necesarias: filas livianas sin hidratar objetos ORM
         if region:
-            query = query.filter(Country.region.ilike(f"%{region}%"))
-        
-        countries = query.all()
+            countries = db.execute(COUNTRIES_BY_REGION_STMT, {"region": region.lower()}).all()
+        else:
+            countries = db.execute(ALL_COUNTRIES_STMT).all()
                 
         if not countries:
             if region:
@@ -66,8 +182,14 @@ async def get_countries(
             else:
                 raise HTTPException(status_code=404, detail="No se encontraron países")
         
+        # Idiomas de todos los países en una segunda consulta (evita el N+1 de la relación)
+        languages_by_country = get_languages_by_country(db, [country.country_id for country in countries])
+        
         return {
-            "countries": [country.to_dict() for country in countries],
+            "countries": [
+                {**country._asdict(), "languages": languages_by_country[country.country_id]}
+                for country in countries
+            ],
             "filters": {
                 "region": region
             }
@@ -82,21 +204,40 @@ async def get_countries(
 #                           Get statistics
 # =============================================================================
 
+# Un único GROUP BY calcula todas las métricas de todas las regiones.
+# Se usa un select() de Core sobre la tabla: filas planas, sin maquinaria del ORM.
+_countries = Country.__table__.c
+REGION_STATS_STMT = select(
+    _countries.region,
+    func.count(_countries.country_id).label('countries_count'),
+    # COALESCE deja los agregados siempre numéricos: no hay que tratar NULL en Python
+    func.coalesce(func.avg(_countries.population), 0).label('avg_population'),
+    func.coalesce(func.sum(_countries.population), 0).label('total_population'),
+    func.coalesce(func.min(_countries.population), 0).label('min_population'),
+    func.coalesce(func.max(_countries.population), 0).label('max_population'),
+    # count(area) ignora NULLs: indica si la región tiene algún país con área
+    func.count(_countries.area).label('area_count'),
+    func.coalesce(func.avg(_countries.area), 0.0).label('avg_area'),
+    func.coalesce(func.sum(_countries.area), 0.0).label('total_area'),
+    func.coalesce(func.min(_countries.area), 0.0).label('min_area'),
+    func.coalesce(func.max(_countries.area), 0.0).label('max_area')
+).group_by(_countries.region)
+# Con filtro, la región se compara en SQL contra lower(region): usa ix_country_region_lower
+# y sólo agrupa las filas de esa región
+REGION_STATS_BY_REGION_STMT = REGION_STATS_STMT.where(func.lower(_countries.region) == bindparam("region"))
+
+def get_all_region_stats(db, region):
+    """
+    Devuelve las estadísticas agregadas por región, opcionalmente filtradas (sin distinguir mayúsculas).
+    La respuesta del endpoint ya se cachea con fastapi-cache (TTL de una hora).
+    """
+    if region:
+        return db.execute(REGION_STATS_BY_REGION_STMT, {"region": region.lower()}).all()
+    return db.execute(REGION_STATS_STMT).all()
+
 def get_countries_stats_population(db, region):
     # Estadísticas de población por región
-    stats = db.query(
-        Country.region,
-        func.avg(Country.population).label('avg_population'),
-        func.sum(Country.population).label('total_population'),
-        func.min(Country.population).label('min_population'),
-        func.max(Country.population).label('max_population'),
-        func.count(Country.country_id).label('countries_count')
-    ).group_by(Country.region)
-    
-    if region:
-        stats = stats.filter(Country.region.ilike(f"%{region}%"))
-    
-    results = stats.all()
+    results = get_all_region_stats(db, region)
     
     return {
         "metric": "population",
@@ -104,29 +245,18 @@ def get_countries_stats_population(db, region):
         "statistics": [
             {
                 "region": stat.region,
-                "average_population": int(stat.avg_population) if stat.avg_population else 0,
-                "total_population": int(stat.total_population) if stat.total_population else 0,
-                "min_population": int(stat.min_population) if stat.min_population else 0,
-                "max_population": int(stat.max_population) if stat.max_population else 0,
+                "average_population": int(stat.avg_population),
+                "total_population": int(stat.total_population),
+                "min_population": int(stat.min_population),
+                "max_population": int(stat.max_population),
                 "countries_count": stat.countries_count
             } for stat in results
         ]
     }
 
 def get_countries_stats_area(db, region):
-    # Estadísticas de área por región
-    stats = db.query(
-        Country.region,
-        func.avg(Country.area).label('avg_area'),
-        func.sum(Country.area).label('total_area'),
-        func.min(Country.area).label('min_area'),
-        func.max(Country.area).label('max_area')
-    ).filter(Country.area.isnot(None)).group_by(Country.region)
-    
-    if region:
-        stats = stats.filter(Country.region.ilike(f"%{region}%"))
-    
-    results = stats.all()
+    # Estadísticas de área por región (sólo regiones con algún área conocida)
+    results = [stat for stat in get_all_region_stats(db, region) if stat.area_count]
     
     return {
         "metric": "area",
@@ -134,25 +264,17 @@ def get_countries_stats_area(db, region):
         "statistics": [
             {
                 "region": stat.region,
-                "average_area": float(stat.avg_area) if stat.avg_area else 0,
-                "total_area": float(stat.total_area) if stat.total_area else 0,
-                "min_area": float(stat.min_area) if stat.min_area else 0,
-                "max_area": float(stat.max_area) if stat.max_area else 0
+                "average_area": float(stat.avg_area),
+                "total_area": float(stat.total_area),
+                "min_area": float(stat.min_area),
+                "max_area": float(stat.max_area)
             } for stat in results
         ]
     }
 
 def get_countries_stats_per_region(db, region):
-    # Conteo de países por región
-    stats = db.query(
-        Country.region,
-        func.count(Country.country_id).label('countries_count')
-    ).group_by(Country.region).order_by(desc('countries_count'))
-    
-    if region:
-        stats = stats.filter(Country.region.ilike(f"%{region}%"))
-    
-    results = stats.all()
+    # Conteo de países por región, de mayor a menor
+    results = sorted(get_all_region_stats(db, region), key=lambda stat: stat.countries_count, reverse=True)
     
     return {
         "metric": "countries_per_region",
@@ -166,7 +288,8 @@ def get_countries_stats_per_region(db, region):
     }
 
 @app.get("/countries/stats")
-async def get_countries_stats(
+@cache(expire=CACHE_EXPIRE_SECONDS, key_builder=query_params_key_builder)
+def get_countries_stats(
     metric: str = Query(..., description="Métrica a calcular: population, area, countries_per_region"),
     region: Optional[str] = Query(None, description="Filtrar por región específica"),
     db: Session = Depends(get_db)
@@ -176,12 +299,6 @@ async def get_countries_stats(
     Soporta métricas: population, area, countries_per_region
     """
     try:
-        base_query = db.query(Country)
-        
-        # Filtrar por región si se especifica
-        if region:
-            base_query = base_query.filter(Country.region.ilike(f"%{region}%"))
-        
         if metric == "population":
             return get_countries_stats_population(db, region)
             
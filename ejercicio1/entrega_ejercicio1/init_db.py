@@ -5,7 +5,9 @@ Ejecuta la creación de tablas y opcionalmente carga datos iniciales
 """
 
 import logging
-from models import create_database, get_session, Country, Language
+from models import create_database, get_session, Country, Language, country_language
+from sqlalchemy import exists, insert
+import ijson
 import requests
 
 # Configurar logging
@@ -26,19 +28,22 @@ def check_data_exists():
     """Verifica si ya existen datos en la base de datos"""
     try:
         db = get_session()
-        count = db.query(Country).count()
+        # EXISTS se detiene en la primera fila en lugar de contar toda la tabla
+        data_exists = db.query(exists().where(Country.country_id.isnot(None))).scalar()
         db.close()
-        return count > 0
+        return data_exists
     except Exception as e:
         logger.error(f"Error verificando datos existentes")
         return False
 
 def consume_restcountries_api():
-    # Consumir API
+    """Consume la API y entrega los países uno a uno a medida que se parsea la respuesta"""
     url = "https://restcountries.com/v3.1/all?fields=name,region,population,area,languages,capital,subregion,cca3"
-    response = requests.get(url, timeout=30)
-    response.raise_for_status()
-    return response.json()
+    with requests.get(url, timeout=30, stream=True) as response:
+        response.raise_for_status()
+        # Descomprimir gzip/deflate al leer el stream crudo
+        response.raw.decode_content = True
+        yield from ijson.items(response.raw, "item", use_float=True)
 
 def parse_country(country_data):
     name = country_data.get("name", {}).get("common", "Unknown")
@@ -51,56 +56,87 @@ def parse_country(country_data):
     capital = capital_list[0] if capital_list else None
     subregion = country_data.get("subregion")
     
-    # Crear país
-    return Country(
-        name=name,
-        region=region,
-        population=population,
-        area=area,
-        alpha3_code=alpha3_code,
-        capital=capital,
-        subregion=subregion
+    # Fila del país para el INSERT masivo
+    return {
+        "name": name,
+        "region": region,
+        "population": population,
+        "area": area,
+        "alpha3_code": alpha3_code,
+        "capital": capital,
+        "subregion": subregion
+    }
+
+def parse_language(country_data):
+    """Devuelve los idiomas del país como {iso639_1: nombre}"""
+    return dict(country_data.get("languages", {}))
+
+def load_language_cache(countries_languages, db):
+    """
+    Resuelve todos los idiomas del payload como {iso639_1: language_id}: los existentes se
+    obtienen con una única consulta IN y los que faltan se insertan en un único INSERT masivo.
+    """
+    languages_data = {}
+    for languages in countries_languages:
+        languages_data.update(languages)
+    if not languages_data:
+        return {}
+    
+    language_cache = dict(
+        db.query(Language.iso639_1, Language.language_id)
+        .filter(Language.iso639_1.in_(languages_data.keys()))
+        .all()
     )
-
-def parse_language(country_data, country: Country, language_cache, db):
-    languages_data = country_data.get("languages", {})
-    for iso_code, lang_name in languages_data.items():
-        if iso_code in language_cache:
-            language = language_cache[iso_code]
-        else:
-            language = db.query(Language).filter(Language.iso639_1 == iso_code).first()
-            if not language:
-                language = Language(
-                    iso639_1=iso_code,
-                    name=lang_name,
-                    native_name=lang_name
-                )
-                db.add(language)
-            language_cache[iso_code] = language
-        
-        country.languages.append(language)
+    
+    new_languages = [
+        {"iso639_1": iso_code, "name": lang_name, "native_name": lang_name}
+        for iso_code, lang_name in languages_data.items()
+        if iso_code not in language_cache
+    ]
+    if new_languages:
+        stmt = insert(Language).returning(Language.iso639_1, Language.language_id)
+        language_cache.update(db.execute(stmt, new_languages).all())
+    return language_cache
+
+def insert_countries(country_rows, db):
+    """Inserta todos los países en un único INSERT masivo y devuelve sus ids en el mismo orden"""
+    stmt = insert(Country).returning(Country.country_id, sort_by_parameter_order=True)
+    return db.scalars(stmt, country_rows).all()
+
+def insert_country_languages(country_ids, countries_languages, language_cache, db):
+    """Inserta todas las relaciones país-idioma directamente en la tabla de asociación"""
+    association_rows = [
+        {"country_id": country_id, "language_id": language_cache[iso_code]}
+        for country_id, languages in zip(country_ids, countries_languages)
+        for iso_code in languages
+    ]
+    if association_rows:
+        db.execute(insert(country_language), association_rows)
 
 def parse_all_data(countries_data, db):
-    loaded_countries = 0
-    language_cache = {}  # Cache para evitar duplicados
+    """Parsea los países en una sola pasada (countries_data puede ser un generador) y los inserta en bloque"""
+    country_rows = []
+    countries_languages = []
 
     for country_data in countries_data:
         try:
-            country = parse_country(country_data)   
-            parse_language(country_data, country, language_cache, db)
-
-            db.add(country)
-            loaded_countries += 1
-
-            # Commit cada 50 países para evitar transacciones muy grandes
-            if loaded_countries % 50 == 0:
-                db.commit()
-                logger.info(f"Procesados {loaded_countries} países...")
-
+            country_row = parse_country(country_data)
+            languages = parse_language(country_data)
         except Exception as e:
             logger.warning(f"Error procesando país {country_data.get('name', 'Unknown')}")
             continue
 
+        country_rows.append(country_row)
+        countries_languages.append(languages)
+
+    if not country_rows:
+        return
+
+    language_cache = load_language_cache(countries_languages, db)  # Cache para evitar duplicados
+    country_ids = insert_countries(country_rows, db)
+    insert_country_languages(country_ids, countries_languages, language_cache, db)
+    logger.info(f"Procesados {len(country_ids)} países")
+
 def load_from_restcountries():
     """Carga datos reales desde la API de RESTCountries"""
     try:
@@ -109,7 +145,7 @@ def load_from_restcountries():
         countries_data = consume_restcountries_api()        
         parse_all_data(countries_data, db)
         
-        # Commit final
+        # Commit único al final de la carga
         db.commit()      
         db.close()
         
@@ -1,8 +1,22 @@
-from sqlalchemy import Column, Integer, String, BigInteger, Float, ForeignKey, Table, create_engine
+import sqlite3
+from sqlalchemy import Column, Integer, String, BigInteger, Float, ForeignKey, Table, Index, create_engine, event, func
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import relationship, sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
 
 Base = declarative_base()
 
+def _column_values(instance, keys):
+    """
+    Lee las columnas ya cargadas directamente del __dict__ de la instancia, sin pasar por los
+    descriptores instrumentados de SQLAlchemy. Si alguna columna está expirada (p. ej. tras un
+    commit) o nunca se asignó, se usa getattr, que la carga o devuelve su valor por defecto.
+    """
+    state = instance.__dict__
+    if all(key in state for key in keys):
+        return {key: state[key] for key in keys}
+    return {key: getattr(instance, key) for key in keys}
+
 # Tabla de relación muchos a muchos entre Country y Language
 country_language = Table(
     'country_language',
@@ -23,21 +37,27 @@ class Country(Base):
     capital = Column(String)
     subregion = Column(String)
     
+    # Índice sobre lower(region) para que el filtro por región (insensible a mayúsculas) use B-tree.
+    # Índice compuesto que cubre el GROUP BY de estadísticas: se resuelve sin leer la tabla.
+    __table_args__ = (
+        Index("ix_country_region_lower", func.lower(region)),
+        Index("ix_country_region_stats", region, population, area),
+    )
+    
     # Relación muchos a muchos con Language
     languages = relationship("Language", secondary=country_language, back_populates="countries")
     
+    _DICT_COLUMNS = ("country_id", "name", "region", "population", "area", "alpha3_code", "capital", "subregion")
+
     def to_dict(self):
-        return {
-            "country_id": self.country_id,
-            "name": self.name,
-            "region": self.region,
-            "population": self.population,
-            "area": self.area,
-            "alpha3_code": self.alpha3_code,
-            "capital": self.capital,
-            "subregion": self.subregion,
-            "languages": [lang.to_dict() for lang in self.languages]
-        }
+        """
+        Para serializar varios países, cargarlos con sus idiomas de antemano
+        (session.query(Country).options(selectinload(Country.languages))) y evitar el N+1.
+        El endpoint /countries no pasa por aquí: lee sólo columnas y trae los idiomas en una consulta.
+        """
+        data = _column_values(self, self._DICT_COLUMNS)
+        data["languages"] = [lang.to_dict() for lang in self.languages]
+        return data
 
 class Language(Base):
     __tablename__ = 'languages'
@@ -50,20 +70,71 @@ class Language(Base):
     # Relación muchos a muchos con Country
     countries = relationship("Country", secondary=country_language, back_populates="languages")
     
+    _DICT_COLUMNS = ("language_id", "iso639_1", "name", "native_name")
+
     def to_dict(self):
-        return {
-            "language_id": self.language_id,
-            "iso639_1": self.iso639_1,
-            "name": self.name,
-            "native_name": self.native_name
-        }
+        return _column_values(self, self._DICT_COLUMNS)
+
+# Parámetros del pool de conexiones (QueuePool) compartido por los workers
+POOL_SIZE = 20
+MAX_OVERFLOW = 10
+POOL_TIMEOUT = 30
+
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Configura cada conexión SQLite (app y tests): con WAL y synchronous=NORMAL los commits
+    no esperan un fsync del journal, y las tablas temporales y lecturas usan memoria.
+    """
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
+# Engine único del proceso: todas las sesiones comparten su pool de conexiones
+_engine = None
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        _engine = create_engine(
+            "sqlite:///./countries.db",
+            echo=False,
+            poolclass=QueuePool,
+            pool_size=POOL_SIZE,
+            max_overflow=MAX_OVERFLOW,
+            pool_timeout=POOL_TIMEOUT,
+            # Las conexiones del pool pueden usarse desde distintos hilos del servidor
+            connect_args={"check_same_thread": False}
+        )
+    return _engine
 
 def create_database():
-    engine = create_engine("sqlite:///./countries.db", echo=False)
+    engine = get_engine()
     Base.metadata.create_all(bind=engine)
     return engine
 
+def warm_up_pool(engine):
+    """
+    Abre y devuelve al pool una conexión, que aplica los PRAGMA (WAL queda guardado en el archivo).
+    Abrir una conexión SQLite es abrir un archivo local: precalentar POOL_SIZE solo sumaría
+    tiempo de arranque y descriptores abiertos.
+    """
+    engine.connect().close()
+
+# Fábrica de sesiones única del proceso, ligada al engine compartido
+_SessionLocal = None
+
 def get_session():
-    engine = create_database()
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    return SessionLocal()
\ No newline at end of file
+    """
+    Devuelve una sesión nueva. La fábrica se crea (y las tablas se verifican con create_all)
+    solo la primera vez: las llamadas siguientes no vuelven a emitir los CREATE TABLE.
+    """
+    global _SessionLocal
+    if _SessionLocal is None:
+        _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=create_database())
+    return _SessionLocal()
\ No newline at end of file
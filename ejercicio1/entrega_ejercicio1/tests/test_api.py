@@ -1,12 +1,56 @@
 import pytest
 import sys
 import os
+import json
+import asyncio
+from fastapi import Request
+from fastapi.responses import StreamingResponse
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app import app
+import init_db
+from app import app, get_db, get_all_region_stats, countries_etag_middleware, REGION_STATS_BY_REGION_STMT
+from models import Base, Country
+
+# --- Test Database Setup ---
+# In-memory database shared by every session through a single static connection
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Cached RESTCountries response, so the suite does not depend on the network
+RESTCOUNTRIES_FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'restcountries.json')
+
+
+def override_get_db():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def seeded_db():
+    """Seeds the in-memory database once and points the app at it."""
+    Base.metadata.create_all(bind=engine)
+    with open(RESTCOUNTRIES_FIXTURE, encoding='utf-8') as f:
+        countries_data = json.load(f)
+
+    db = TestingSessionLocal()
+    init_db.parse_all_data(countries_data, db)
+    db.commit()
+    db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield
+    app.dependency_overrides.clear()
+    Base.metadata.drop_all(bind=engine)
+
 
 # --- TestClient Instance ---
 client = TestClient(app)
@@ -40,6 +84,52 @@ class TestCountriesEndpoint:
         assert data["countries"][0]["region"] == "Americas"
         assert data["countries"][55]["region"] == "Americas"
 
+    def test_filter_by_region_case_insensitive(self):
+        """Tests that the region filter ignores case."""
+        response = client.get("/countries?region=americas")
+        assert response.status_code == 200
+        assert len(response.json()["countries"]) == 56
+
+    def test_repeated_request_served_from_cache(self):
+        """Tests that an identical request is answered from the response cache."""
+        client.get("/countries?region=Oceania")
+        response = client.get("/countries?region=Oceania")
+        assert response.status_code == 200
+        assert response.headers["X-FastAPI-Cache"] == "HIT"
+
+    def test_matching_etag_returns_not_modified(self):
+        """Tests that a request with the current ETag gets a 304 without body."""
+        etag = client.get("/countries?region=Europe").headers["ETag"]
+        response = client.get("/countries?region=Europe", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_etag_only_on_countries_endpoints(self):
+        """Tests that the ETag middleware matches the endpoint paths exactly, not by prefix."""
+        async def call_next(request):
+            return StreamingResponse(iter([b"{}"]), media_type="application/json")
+
+        def run(path):
+            request = Request({"type": "http", "method": "GET", "path": path, "headers": [], "query_string": b""})
+            return asyncio.run(countries_etag_middleware(request, call_next))
+
+        assert "etag" in run("/countries").headers
+        assert "etag" in run("/countries/stats").headers
+        assert "etag" not in run("/countries-export").headers
+
+    def test_etag_keeps_repeated_headers(self):
+        """Tests that headers repeated in the original response survive the ETag rewrite."""
+        async def call_next(request):
+            response = StreamingResponse(iter([b"{}"]), media_type="application/json")
+            response.raw_headers.append((b"set-cookie", b"a=1"))
+            response.raw_headers.append((b"set-cookie", b"b=2"))
+            return response
+
+        request = Request({"type": "http", "method": "GET", "path": "/countries", "headers": [], "query_string": b""})
+        response = asyncio.run(countries_etag_middleware(request, call_next))
+        assert response.headers.getlist("set-cookie") == ["a=1", "b=2"]
+        assert "etag" in response.headers
+
     def test_filter_by_nonexistent_region(self):
         """Tests filtering by a region that does not exist."""
         response = client.get("/countries?region=Atlantis")
@@ -86,3 +176,38 @@ class TestStatsEndpoint:
         assert data["region_filter"] == "Europe"
         assert len(data["statistics"]) == 1
         assert data["statistics"][0]["region"] == "Europe"
+
+    def test_stats_region_filter_case_insensitive(self):
+        """Tests that the stats region filter ignores case."""
+        response = client.get("/countries/stats?metric=countries_per_region&region=eUROPE")
+        assert response.status_code == 200
+        statistics = response.json()["statistics"]
+        assert [stat["region"] for stat in statistics] == ["Europe"]
+
+    def test_stats_region_filter_uses_lower_region_index(self):
+        """Tests that the stats region filter is the indexed lower(region) predicate in SQL."""
+        db = TestingSessionLocal()
+        try:
+            compiled = REGION_STATS_BY_REGION_STMT.params(region="europe").compile(bind=engine)
+            params = tuple(compiled.params[name] for name in compiled.positiontup)
+            plan = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+        finally:
+            db.close()
+        assert any("ix_country_region_lower" in row[-1] for row in plan)
+
+    def test_region_stats_reflect_newly_inserted_data(self):
+        """Tests that region stats are not memoized across data changes (e.g. an empty first read)."""
+        empty_engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=empty_engine)
+        db = sessionmaker(bind=empty_engine)()
+        try:
+            assert get_all_region_stats(db, None) == []
+
+            db.add(Country(name="Newland", region="Oceania", population=100, area=10.0))
+            db.commit()
+
+            stats = get_all_region_stats(db, None)
+            assert [(stat.region, stat.countries_count) for stat in stats] == [("Oceania", 1)]
+        finally:
+            db.close()
+            empty_engine.dispose()
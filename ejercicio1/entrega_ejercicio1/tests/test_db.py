@@ -1,9 +1,10 @@
 import pytest
 import sys
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import StaticPool
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -11,22 +12,40 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from models import Base, Country, Language
 
 # --- Test Database Setup ---
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test_db_isolated.db" # Use a different file for isolation
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# In-memory database shared by every session through a single connection (no file I/O)
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+# Sessions join the per-test transaction through a SAVEPOINT, so test commits never persist
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, join_transaction_mode="create_savepoint")
+
+# pysqlite defers BEGIN on its own, which breaks SAVEPOINT: let SQLAlchemy emit BEGIN instead
+@event.listens_for(engine, "connect")
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+@event.listens_for(engine, "begin")
+def _emit_begin(connection):
+    connection.exec_driver_sql("BEGIN")
+
+# --- Pytest Fixtures for DB ---
+@pytest.fixture(scope="session")
+def db_tables():
+    """Fixture that creates the tables once for the whole test session."""
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
 
-# --- Pytest Fixture for DB ---
 @pytest.fixture(scope="function")
-def db_session():
-    """Fixture to set up and tear down the test database for each test function."""
-    Base.metadata.create_all(bind=engine)
-    db = TestingSessionLocal()
+def db_session(db_tables):
+    """Fixture that runs each test inside a transaction rolled back on teardown."""
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = TestingSessionLocal(bind=connection)
     try:
         yield db
     finally:
-        db.rollback() # Rollback any lingering transactions
         db.close()
-        Base.metadata.drop_all(bind=engine)
+        transaction.rollback() # Discard everything the test wrote, including commits
+        connection.close()
 
 
 # --- Test Class for Database Models ---
@@ -174,3 +193,26 @@ class TestDatabaseModels:
         assert "languages" in country_dict
         assert isinstance(country_dict["languages"], list)
         assert len(country_dict["languages"]) == 0
+
+    def test_get_session_reuses_session_factory(self, db_session, monkeypatch):
+        """Tests that get_session creates the tables once and reuses its session factory."""
+        import models
+        create_all_calls = []
+        monkeypatch.setattr(models, "_engine", engine)
+        monkeypatch.setattr(models, "_SessionLocal", None)
+        monkeypatch.setattr(Base.metadata, "create_all", lambda **kwargs: create_all_calls.append(kwargs))
+
+        first = models.get_session()
+        second = models.get_session()
+        try:
+            assert first is not second
+            assert first.get_bind() is engine
+            assert len(create_all_calls) == 1
+        finally:
+            first.close()
+            second.close()
+
+    def test_committed_rows_do_not_leak_between_tests(self, db_session):
+        """Tests that rows committed by other tests are rolled back with their transaction."""
+        assert db_session.query(Country).count() == 0
+        assert db_session.query(Language).count() == 0
@@ -1,9 +1,15 @@
 # data_loading.py
 import os
+from types import MappingProxyType
 from abc import ABC, abstractmethod
 import pandas as pd
 from pandas import DataFrame
-from typing import Dict
+from typing import Mapping
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él se usa pd.read_json
+    orjson = None
 
 class SalesDataReader(ABC):
     """Interfaz para lectores de datos de ventas (Strategy Pattern)."""
@@ -16,26 +22,70 @@ class JsonSalesReader(SalesDataReader):
     """Implementación para leer datos de ventas desde un archivo JSON."""
     def read(self, file_path: str) -> DataFrame:
         try:
+            if orjson is not None:
+                return self._read_with_orjson(file_path)
             # Asumiendo un formato de registro (orient='records')
             return pd.read_json(file_path, orient='records')
         except ValueError as e:
             # Excepción más específica para el fallo de formato
             raise ValueError(f"Formato JSON inválido en {file_path}. Detalle: {e}")
 
+    @staticmethod
+    def _read_with_orjson(file_path: str) -> DataFrame:
+        """Decodifica el archivo con orjson (parser en C) y arma el DataFrame de registros."""
+        with open(file_path, 'rb') as f:
+            records = orjson.loads(f.read())
+
+        if not isinstance(records, list):
+            raise ValueError("se esperaba una lista de registros")
+
+        df = pd.DataFrame(records)
+        # Igual que pd.read_json: la columna 'date' se convierte a datetime cuando es posible
+        if 'date' in df.columns:
+            try:
+                df['date'] = pd.to_datetime(df['date'])
+            except (ValueError, TypeError):
+                pass
+        return df
+
 class CsvSalesReader(SalesDataReader):
     """Implementación para leer datos de ventas desde un archivo CSV."""
+    def __init__(self, use_pyarrow: bool = False):
+        # El motor de pyarrow lee el CSV en paralelo, pero infiere tipos distinto al motor C
+        # (por ejemplo, 'date' queda como objetos datetime.date en vez de strings), por eso se
+        # activa de forma explícita y no se reemplaza en silencio por el motor C si falta.
+        self._use_pyarrow = use_pyarrow
+
     def read(self, file_path: str) -> DataFrame:
         # Los errores de lectura de archivos son manejados por la capa superior (DataLoader)
+        if self._use_pyarrow:
+            # pyarrow se importa solo al usarse, para no cargarlo con el motor C por defecto
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError as e:
+                raise ImportError("Se pidió el motor 'pyarrow' para leer CSV, pero pyarrow no está instalado") from e
+            return pd.read_csv(file_path, engine='pyarrow')
         return pd.read_csv(file_path)
 
+# Mapeo de extensiones (en minúsculas) a implementaciones de lector. Los lectores no guardan
+# estado, así que se crean una sola vez y todos los DataLoader comparten el mapeo de solo lectura.
+_DEFAULT_READERS: Mapping[str, SalesDataReader] = MappingProxyType({
+    '.json': JsonSalesReader(),
+    '.csv': CsvSalesReader(),
+})
+# Igual que el mapeo por defecto, pero los CSV se leen con el motor de pyarrow
+_PYARROW_CSV_READERS: Mapping[str, SalesDataReader] = MappingProxyType({
+    **_DEFAULT_READERS,
+    '.csv': CsvSalesReader(use_pyarrow=True),
+})
+
 class DataLoader:
     """Orquesta la carga de datos usando el lector apropiado (Simple Factory Pattern)."""
-    def __init__(self):
-        # Mapeo de extensiones a implementaciones de lector.
-        self._readers: Dict[str, SalesDataReader] = {
-            '.json': JsonSalesReader(),
-            '.csv': CsvSalesReader(),
-        }
+    __slots__ = ('_readers',)
+
+    def __init__(self, use_pyarrow_csv: bool = False):
+        # use_pyarrow_csv: leer los CSV con el motor de pyarrow (requiere pyarrow instalado)
+        self._readers: Mapping[str, SalesDataReader] = _PYARROW_CSV_READERS if use_pyarrow_csv else _DEFAULT_READERS
 
     def load_from_file(self, file_path: str) -> DataFrame:
         """Determina el lector por extensión y realiza la lectura."""
@@ -1,13 +1,21 @@
 # reporting.py
 import json
 import csv
+import io
 from datetime import datetime
 from abc import ABC, abstractmethod
 import os
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Set, Tuple
 import logging
+from collections import defaultdict
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él se usa el módulo json estándar
+    orjson = None
 
 log = logging.getLogger(__name__)
 
@@ -18,120 +26,332 @@ class ReportCalculator:
     Orquesta el cálculo de reportes de ventas. 
     Se enfoca en el flujo: Preparar -> Filtrar -> Agregar.
     """
+    def __init__(self):
+        # Cache del último DataFrame procesado: (DataFrame de origen, huella, DataFrame enriquecido)
+        self._enriched_cache: Optional[Tuple[DataFrame, Tuple[Any, ...], DataFrame]] = None
+        # user_id de cada fila del DataFrame enriquecido, ordenado para búsquedas binarias
+        self._sorted_user_ids: np.ndarray = np.empty(0, dtype=np.int64)
+        # Código de mes de cada fila, como array contiguo y homogéneo
+        self._month_codes: np.ndarray = np.empty(0, dtype=np.int64)
+        # Totales mensuales y anuales de todos los usuarios, ordenados por (usuario, periodo)
+        self._monthly_table: Dict[str, np.ndarray] = {}
+        self._yearly_table: Dict[str, np.ndarray] = {}
+        # Columnas de detalle de todas las ventas como listas nativas (se construye bajo demanda)
+        self._items_table: Optional[Tuple[List[str], List[List[Any]], np.ndarray, Dict[int, List[int]]]] = None
+        # Reportes ya calculados para el DataFrame en caché, por user_id
+        self._report_cache: Dict[int, Dict[str, Any]] = {}
+
+    def precompute(self, sales_df: DataFrame) -> DataFrame:
+        """
+        Limpia y enriquece el DataFrame de ventas una sola vez y guarda el resultado.
+        Las llamadas siguientes con el mismo DataFrame reutilizan el resultado, de modo que
+        calcular reportes para N usuarios no repite N veces la conversión de tipos.
+        La cache se identifica por el objeto DataFrame más su forma y tipos de columna: agregar
+        filas o columnas la invalida, pero editar valores en el lugar no (ver calculate_for_user).
+        """
+        fingerprint = self._fingerprint(sales_df)
+        if (self._enriched_cache is not None
+                and self._enriched_cache[0] is sales_df
+                and self._enriched_cache[1] == fingerprint):
+            return self._enriched_cache[2]
+
+        enriched_df = self._process_and_enrich_data(sales_df)
+        # Orden estable por usuario: las ventas de cada usuario quedan contiguas y en su orden original
+        user_ids = enriched_df['user_id'].to_numpy()
+        order = np.argsort(user_ids, kind='stable')
+        enriched_df = enriched_df.take(order)
+        self._sorted_user_ids = user_ids[order]
+        self._enriched_cache = (sales_df, fingerprint, enriched_df)
+        # Clave de periodo mensual como entero (meses desde 1970-01): agrupar por int64 es más
+        # barato que por strings. Se calcula una vez para todas las filas, no por usuario.
+        self._month_codes = np.ascontiguousarray(
+            enriched_df['date'].to_numpy().astype('datetime64[M]').astype(np.int64)
+        )
+        total_sales = np.ascontiguousarray(enriched_df['total_sale'].to_numpy(dtype=np.float64))
+
+        # Una única agregación mensual y anual para todos los usuarios; cada reporte solo toma su tramo
+        self._monthly_table = self._aggregate_monthly_totals(total_sales, self._sorted_user_ids, self._month_codes)
+        self._yearly_table = self._aggregate_yearly_totals(self._monthly_table)
+        self._items_table = None
+        self._report_cache = {}
+        return enriched_df
+
+    @staticmethod
+    def _fingerprint(sales_df: DataFrame) -> Tuple[Any, ...]:
+        """Huella barata del DataFrame (forma, columnas y tipos), sin recorrer sus valores."""
+        return (sales_df.shape, tuple(sales_df.dtypes.items()))
+
     def calculate_for_user(self, sales_df: DataFrame, user_id: int) -> Optional[Dict[str, Any]]:
         """
         Calcula reportes de ventas mensuales y anuales para un usuario.
         Devuelve None si el DataFrame está vacío o no hay ventas para el usuario.
+
+        El DataFrame enriquecido y los reportes se reutilizan mientras se pase el mismo objeto
+        con la misma forma y tipos. Si se modifican valores en el lugar (p. ej. df['price'] *= 2),
+        hay que pasar una copia para no obtener resultados anteriores. Cada llamada devuelve una
+        copia propia del reporte guardado: modificarla no altera las llamadas siguientes.
         """
         if sales_df.empty:
             return None
 
-        # 1. Preparación y enriquecimiento de datos
-        processed_df = self._process_and_enrich_data(sales_df.copy())
+        # 1. Preparación y enriquecimiento de datos (una sola vez por DataFrame)
+        self.precompute(sales_df)
         
-        # 2. Filtrado por usuario
-        user_sales = processed_df[processed_df['user_id'] == user_id].copy()
-        if user_sales.empty:
+        # 2. Filtrado por usuario: búsqueda binaria del tramo contiguo de sus ventas
+        user_rows = self._user_slice(self._sorted_user_ids, user_id)
+        if user_rows.start == user_rows.stop:
             return None # Devolvemos None, ya que 'ReportCalculator' no encontró datos.
 
-        # 3. Agregación de datos
-        return self._create_user_report_data(user_sales, user_id)
+        # 3. Agregación de datos: los totales ya están calculados para todos los usuarios.
+        # Los datos no cambian mientras el DataFrame sea el mismo, así que el reporte se reutiliza;
+        # solo la marca de tiempo se renueva en cada llamada.
+        report = self._report_cache.get(user_id)
+        if report is None:
+            report = self._report_cache[user_id] = self._create_user_report_data(user_id, user_rows)
+        return self._copy_report(report)
+
+    @staticmethod
+    def _copy_report(report: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Copia un reporte guardado hasta sus ítems, con fecha de generación nueva. Los valores
+        hoja son escalares inmutables, así que copiar los contenedores basta (más barato que deepcopy).
+        """
+        monthly = {}
+        for month, month_report in report['monthly'].items():
+            month_copy = dict(month_report)
+            if 'items' in month_copy:
+                month_copy['items'] = [dict(item) for item in month_copy['items']]
+            monthly[month] = month_copy
+        return {
+            **report,
+            'monthly': monthly,
+            'yearly': {year: dict(year_report) for year, year_report in report['yearly'].items()},
+            'generated_at': datetime.now().isoformat()
+        }
+
+    @staticmethod
+    def _user_slice(sorted_user_ids: np.ndarray, user_id: int) -> slice:
+        """Devuelve el tramo de posiciones de un usuario dentro de un array ordenado por usuario."""
+        start = np.searchsorted(sorted_user_ids, user_id, side='left')
+        end = np.searchsorted(sorted_user_ids, user_id, side='right')
+        return slice(int(start), int(end))
+
+    def calculate_for_users(self, sales_df: DataFrame, user_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Calcula los reportes de varios usuarios enriqueciendo el DataFrame una sola vez.
+        Devuelve solo los usuarios que tienen ventas válidas.
+        """
+        reports: Dict[int, Dict[str, Any]] = {}
+        if sales_df.empty:
+            return reports
+
+        for user_id in user_ids:
+            report_data = self.calculate_for_user(sales_df, user_id)
+            if report_data is not None:
+                reports[user_id] = report_data
+        return reports
 
     def _process_and_enrich_data(self, df: DataFrame) -> DataFrame:
         """
         Función orquestadora que limpia tipos y añade columnas de cálculo.
         Mezcla de niveles de abstracción es aceptable aquí como función de pipeline.
         """
-        cleaned_df = self._clean_data_types(df)
-        enriched_df = self._calculate_total_sale(cleaned_df)
-        
-        # Garantizar que no haya NaN en columnas críticas después de la limpieza
-        rows_before = len(enriched_df)
-        enriched_df.dropna(subset=['date', 'price', 'quantity', 'user_id'], inplace=True)
-        
-        if len(enriched_df) < rows_before:
-            log.warning(f"Se descartaron {rows_before - len(enriched_df)} registros por datos inválidos después de la conversión de tipos.")
+        columns = self._clean_data_types(df)
+
+        # Garantizar que no haya NaN en columnas críticas después de la limpieza:
+        # una única máscara de validez y un único filtrado del DataFrame.
+        valid = ~(
+            np.isnan(columns['user_id'])
+            | np.isnan(columns['price'])
+            | np.isnan(columns['quantity'])
+            | np.isnat(columns['date'])
+        )
+        enriched_df = df.take(np.flatnonzero(valid))
+        for name, values in columns.items():
+            values = values[valid]
+            if name in ('user_id', 'quantity'):
+                values = self._as_integer_if_integral(values)
+            enriched_df[name] = values
+        enriched_df['total_sale'] = self._calculate_total_sale(enriched_df['price'].to_numpy(), enriched_df['quantity'].to_numpy())
+
+        discarded = len(df) - len(enriched_df)
+        if discarded:
+            log.warning(f"Se descartaron {discarded} registros por datos inválidos después de la conversión de tipos.")
             
         return enriched_df
 
-    def _clean_data_types(self, df: DataFrame) -> DataFrame:
-        """Convierte las columnas relevantes a sus tipos de datos esperados (Limpieza)."""
-        df['user_id'] = pd.to_numeric(df['user_id'], errors='coerce')
-        df['date'] = pd.to_datetime(df['date'], errors='coerce')
-        df['price'] = pd.to_numeric(df['price'], errors='coerce')
-        df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce')
-        return df
+    def _clean_data_types(self, df: DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Convierte las columnas relevantes a sus tipos de datos esperados (Limpieza).
+        Devuelve los arrays convertidos: el DataFrame de entrada no se modifica.
+        """
+        return {
+            'user_id': self._numeric_values(df['user_id']),
+            'date': self._datetime_values(df['date']),
+            'price': self._numeric_values(df['price']),
+            'quantity': self._numeric_values(df['quantity']),
+        }
+
+    # Las columnas que ya llegan con el tipo esperado (p. ej. DataFrames preparados por el
+    # llamador) se usan tal cual: solo las demás pasan por la conversión de pandas.
+    @staticmethod
+    def _numeric_values(values: pd.Series) -> np.ndarray:
+        """Devuelve la columna como array numérico; los valores no convertibles quedan como NaN."""
+        if isinstance(values.dtype, np.dtype) and values.dtype.kind in 'iuf':
+            return values.to_numpy()
+        return pd.to_numeric(values, errors='coerce').to_numpy()
 
-    def _calculate_total_sale(self, df: DataFrame) -> DataFrame:
-        """Calcula la columna de venta total (Generación de Features)."""
-        df['total_sale'] = df['price'] * df['quantity']
-        return df
+    @staticmethod
+    def _datetime_values(values: pd.Series) -> np.ndarray:
+        """Devuelve la columna como array datetime64; los valores no convertibles quedan como NaT."""
+        if isinstance(values.dtype, np.dtype) and values.dtype.kind == 'M':
+            return values.to_numpy()
+        dates = pd.to_datetime(values, errors='coerce')
+        if isinstance(dates.dtype, pd.DatetimeTZDtype):
+            # Fechas con zona horaria (p. ej. '2025-01-10T10:00:00Z'): to_numpy() daría un array de
+            # objetos. Se conserva la hora local sin la zona, igual que al agrupar con dt.to_period.
+            dates = dates.dt.tz_localize(None)
+        return dates.to_numpy()
 
-    def _create_user_report_data(self, user_sales: DataFrame, user_id: int) -> Dict[str, Any]:
+    @staticmethod
+    def _as_integer_if_integral(values: np.ndarray) -> np.ndarray:
+        """
+        Devuelve los valores como int64 si son flotantes sin parte decimal.
+        to_numeric produce float64 cuando la columna original tenía valores inválidos,
+        aunque tras descartarlos los valores restantes sean enteros.
+        """
+        if values.dtype.kind == 'f' and (values % 1 == 0).all():
+            return values.astype(np.int64)
+        return values
+
+    def _calculate_total_sale(self, price: np.ndarray, quantity: np.ndarray) -> np.ndarray:
+        """Calcula la venta total de cada transacción (Generación de Features)."""
+        return price * quantity
+
+    def _create_user_report_data(self, user_id: int, user_rows: slice) -> Dict[str, Any]:
         """Agrupa los resultados de las agregaciones en la estructura de reporte final."""
         return {
-            'monthly': self._aggregate_monthly(user_sales),
-            'yearly': self._aggregate_yearly(user_sales),
+            'monthly': self._aggregate_monthly(user_id, user_rows),
+            'yearly': self._aggregate_yearly(user_id),
             'user_id': user_id,
             'generated_at': datetime.now().isoformat()
         }
 
-    def _aggregate_monthly(self, df: DataFrame) -> Dict[str, Any]:
+    def _aggregate_monthly_totals(self, totals: np.ndarray, user_ids: np.ndarray, months: np.ndarray) -> Dict[str, np.ndarray]:
+        """Suma y cuenta las ventas por (usuario, mes) para todos los usuarios a la vez."""
+        # Agregación numérica básica (SRP: Solo agregación). El resultado queda ordenado por
+        # usuario y luego por mes, de modo que cada reporte conserva el orden cronológico.
+        aggregation = pd.Series(totals).groupby([user_ids, months]).agg(total='sum', count='count')
+        return self._period_table(aggregation, 'datetime64[M]')
+
+    def _aggregate_yearly_totals(self, monthly_table: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Deriva los totales por (usuario, año) de los mensuales, sin volver a recorrer las ventas."""
+        monthly = pd.DataFrame({'total': monthly_table['total'], 'count': monthly_table['count']})
+        aggregation = monthly.groupby([monthly_table['user_id'], monthly_table['code'] // 12]).sum()
+        return self._period_table(aggregation, 'datetime64[Y]')
+
+    @staticmethod
+    def _period_table(aggregation: DataFrame, unit: str) -> Dict[str, np.ndarray]:
+        """Convierte una agregación indexada por (usuario, periodo) en columnas NumPy."""
+        codes = aggregation.index.get_level_values(1).to_numpy(dtype=np.int64)
+        total = aggregation['total'].to_numpy(dtype=np.float64)
+        count = aggregation['count'].to_numpy(dtype=np.int64)
+        return {
+            'user_id': aggregation.index.get_level_values(0).to_numpy(),
+            'code': codes,
+            # Solo los periodos agregados se convierten a texto ('YYYY-MM' / 'YYYY'), vectorizado en NumPy
+            'label': codes.astype(unit).astype(str),
+            'total': total,
+            'count': count,
+            'average': total / count,
+        }
+
+    @staticmethod
+    def _period_report(table: Dict[str, np.ndarray], rows: slice) -> Dict[str, Dict[str, Any]]:
+        """Arma {periodo: {total, count, average}} a partir del tramo de un usuario."""
+        return {
+            label: {'total': total, 'count': count, 'average': average}
+            for label, total, count, average in zip(
+                table['label'][rows].tolist(),
+                table['total'][rows].tolist(),
+                table['count'][rows].tolist(),
+                table['average'][rows].tolist(),
+            )
+        }
+
+    def _aggregate_monthly(self, user_id: int, user_rows: slice) -> Dict[str, Any]:
         """Agrega ventas por mes y añade los ítems detallados (Cohesión mejorada)."""
-        if df.empty:
-            return {}
+        monthly_rows = self._user_slice(self._monthly_table['user_id'], user_id)
+        monthly_report = self._period_report(self._monthly_table, monthly_rows)
         
-        # 1. Creación de la clave de periodo
-        df['period'] = df['date'].dt.to_period('M').astype(str)
-        
-        # 2. Agregación numérica básica (SRP: Solo agregación)
-        monthly_aggregation = df.groupby('period').agg(
-            total=('total_sale', 'sum'),
-            count=('total_sale', 'count')
-        )
-        monthly_aggregation['average'] = monthly_aggregation['total'] / monthly_aggregation['count']
-        
-        # 3. Obtención y unión de los detalles (Responsabilidad Separada)
-        items_detail = self._extract_transaction_items_detail(df)
-        monthly_aggregation = monthly_aggregation.join(items_detail)
+        # Obtención y unión de los detalles (Responsabilidad Separada)
+        items_by_month = self._extract_transaction_items_detail(user_rows)
+        for month_report, month in zip(monthly_report.values(), self._monthly_table['code'][monthly_rows].tolist()):
+            month_report['items'] = items_by_month[month]
 
-        return monthly_aggregation.to_dict('index')
+        return monthly_report
+
+    def _get_items_table(self) -> Tuple[List[str], List[List[Any]], np.ndarray, Dict[int, List[int]]]:
+        """
+        Extrae una sola vez las columnas de detalle de todas las ventas enriquecidas.
+        Cada reporte solo toma su tramo de las listas, sin volver a pasar por pandas.
+        """
+        if self._items_table is not None:
+            return self._items_table
 
-    def _extract_transaction_items_detail(self, df: DataFrame) -> DataFrame:
-        """Extrae los detalles de la transacción y los agrupa en una lista por periodo."""
-        # Se asegura de no modificar el DF original y usa solo las columnas de interés
+        df = self._enriched_cache[2]
+        # Solo se leen las columnas de interés; el DF original no se modifica ni se copia
         detail_cols = ['date', 'price', 'quantity', 'product', 'category', 'payment_method']
         
         # Filtrar columnas disponibles para evitar errores.
         cols_to_keep = [col for col in detail_cols if col in df.columns]
-        df_detail = df[cols_to_keep].copy()
-        
-        # Formatear la fecha para la salida del reporte.
-        df_detail['date'] = df_detail['date'].dt.strftime('%Y-%m-%d')
 
-        def row_to_clean_dict(row: pd.Series) -> Dict[str, Any]:
-            """Convierte una fila a dict, eliminando NaNs (Guardian Pattern para nulos)."""
-            item_dict = row.to_dict()
-            return {k: v for k, v in item_dict.items() if pd.notna(v)}
+        # Construcción columnar: cada columna se extrae una vez como lista de tipos nativos
+        # y su máscara de nulos se empaqueta en un bit por columna (un entero por fila).
+        names = []
+        column_values = []
+        row_masks = np.zeros(len(df), dtype=np.int64)
+        for bit, col in enumerate(cols_to_keep):
+            values = df[col]
+            if col == 'date':
+                # Formatear la fecha para la salida del reporte. La columna enriquecida siempre es
+                # datetime64 sin zona horaria, así que NumPy formatea todo el array en C.
+                values = pd.Series(np.datetime_as_string(values.to_numpy(), unit='D'), index=values.index)
+            names.append(col)
+            column_values.append(values.tolist())
+            row_masks |= values.notna().to_numpy().astype(np.int64) << bit
 
-        # Crear la lista de diccionarios (items)
-        items = df_detail.apply(row_to_clean_dict, axis=1).rename('items')
-        
-        # Agrupar la lista de items por el periodo ('period')
-        return items.groupby(df['period']).apply(list)
+        # Columnas presentes para cada combinación de nulos que aparece en los datos
+        kept_columns = {
+            mask: [j for j in range(len(names)) if mask >> j & 1]
+            for mask in np.unique(row_masks).tolist()
+        }
+
+        self._items_table = (names, column_values, row_masks, kept_columns)
+        return self._items_table
+
+    def _extract_transaction_items_detail(self, user_rows: slice) -> Dict[int, List[Dict[str, Any]]]:
+        """Extrae los detalles de la transacción y los agrupa en una lista por código de mes."""
+        names, column_values, row_masks, kept_columns = self._get_items_table()
+        full_mask = (1 << len(names)) - 1
+
+        # Agrupar los items por mes en una sola pasada (Guardian Pattern para nulos).
+        items_by_month: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        rows = zip(*(values[user_rows] for values in column_values))
+        for month, mask, row in zip(self._month_codes[user_rows].tolist(), row_masks[user_rows].tolist(), rows):
+            if mask == full_mask:
+                # Caso habitual sin nulos: el item se arma directamente desde la fila
+                item = dict(zip(names, row))
+            else:
+                item = {names[j]: row[j] for j in kept_columns[mask]}
+            items_by_month[month].append(item)
+
+        return items_by_month
         
-    def _aggregate_yearly(self, df: DataFrame) -> Dict[str, Any]:
-        """Agrega ventas por año."""
-        if df.empty:
-            return {}
-            
-        df['period'] = df['date'].dt.to_period('Y').astype(str)
-        yearly_aggregation = df.groupby('period').agg(
-            total=('total_sale', 'sum'),
-            count=('total_sale', 'count')
-        )
-        yearly_aggregation['average'] = yearly_aggregation['total'] / yearly_aggregation['count']
-        return yearly_aggregation.to_dict('index')
+    def _aggregate_yearly(self, user_id: int) -> Dict[str, Any]:
+        """Agrega ventas por año a partir de los totales anuales precalculados."""
+        yearly_rows = self._user_slice(self._yearly_table['user_id'], user_id)
+        return self._period_report(self._yearly_table, yearly_rows)
 
 
 # --- Clases de Escritura de Reporte (Strategy Pattern) ---
@@ -139,39 +359,53 @@ class ReportCalculator:
 class ReportWriter(ABC):
     """Interfaz para escritores de reportes."""
     @abstractmethod
-    def write(self, report_data: Dict[str, Any], file_path: str):
-        """Escribe los datos del reporte en la ruta especificada."""
+    def serialize(self, report_data: Dict[str, Any]) -> bytes:
+        """Convierte los datos del reporte al contenido final del archivo."""
         pass
 
+    def write(self, report_data: Dict[str, Any], file_path: str):
+        """Escribe los datos del reporte en la ruta especificada con una única escritura."""
+        payload = self.serialize(report_data)
+        with open(file_path, 'wb') as f:
+            f.write(payload)
+
 class JsonReportWriter(ReportWriter):
     """Escribe un reporte en formato JSON."""
-    def write(self, report_data: Dict[str, Any], file_path: str):
+    def serialize(self, report_data: Dict[str, Any]) -> bytes:
         # Se elimina la clave de preferencia 'preferences' ya que no se usa en JSON
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(report_data, f, indent=2)
+        if orjson is not None:
+            return orjson.dumps(report_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+
+        # Mismo contenido que orjson: UTF-8 sin escapar caracteres no ASCII
+        return json.dumps(report_data, indent=2, ensure_ascii=False).encode('utf-8')
 
 class CsvReportWriter(ReportWriter):
     """Escribe un reporte en formato CSV."""
-    def write(self, report_data: Dict[str, Any], file_path: str):
+    def serialize(self, report_data: Dict[str, Any]) -> bytes:
+        buffer = io.StringIO(newline='')
+        writer = csv.writer(buffer)
+        # Nombres de encabezado más descriptivos y conscientes de la moneda
+        writer.writerow(['Period', f'Total Sales', 'Average Sale', 'Number of Sales'])
         
-        with open(file_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            # Nombres de encabezado más descriptivos y conscientes de la moneda
-            writer.writerow(['Period', f'Total Sales', 'Average Sale', 'Number of Sales'])
-            
-            # Usar las claves refactorizadas
-            for period_type in ['monthly', 'yearly']:
-                # Protección (Guardian Pattern) por si el reporte no tiene ese periodo
-                if period_type not in report_data:
-                    continue 
-                
-                for period_name, data in sorted(report_data[period_type].items()):
-                    writer.writerow([
-                        period_name,
-                        f"{data['total']:.2f}", # Formato de dos decimales para total
-                        f"{data.get('average', 0):.2f}", # Formato de dos decimales para promedio
-                        data['count']
-                    ])
+        # Usar las claves refactorizadas; todas las filas se escriben en una sola llamada
+        writer.writerows(self._rows(report_data))
+        return buffer.getvalue().encode('utf-8')
+
+    @staticmethod
+    def _rows(report_data: Dict[str, Any]):
+        """Genera las filas del CSV: primero los periodos mensuales y luego los anuales."""
+        for period_type in ['monthly', 'yearly']:
+            # Protección (Guardian Pattern) por si el reporte no tiene ese periodo
+            if period_type not in report_data:
+                continue
+
+            for period_name, data in sorted(report_data[period_type].items()):
+                yield (
+                    period_name,
+                    f"{data['total']:.2f}", # Formato de dos decimales para total
+                    f"{data.get('average', 0):.2f}", # Formato de dos decimales para promedio
+                    data['count']
+                )
 
 class ReportGenerator:
     """Orquesta la escritura de reportes usando el escritor apropiado (Factory)."""
@@ -180,24 +414,64 @@ class ReportGenerator:
             'json': JsonReportWriter(),
             'csv': CsvReportWriter(),
         }
+        # Directorios de salida ya creados/verificados: evita un os.makedirs por cada reporte
+        self._ensured_dirs: Set[str] = set()
 
     def generate(self, report_data: Dict[str, Any], output_format: str, output_dir: str, preferences: Dict[str, str]) -> str:
         """Genera el reporte final basado en el formato de salida y las preferencias de usuario."""
-        writer = self._writers.get(output_format.lower())
-
-        if not writer:
-            log.error(f"Formato de salida no soportado: {output_format}")
-            raise ValueError(f"Formato de salida no soportado: {output_format}")
+        extension, writer = self._resolve_writer(output_format)
 
         user_id = report_data['user_id']
-        filename = f"sales_report_{user_id}.{output_format.lower()}"
+        filename = f"sales_report_{user_id}.{extension}"
         filepath = os.path.join(output_dir, filename)
         
         # Garantizar que el directorio exista (Separación de Concerns: OS vs Writer)
+        self._ensure_output_dir(output_dir)
+            
+        self._write(writer, report_data, output_dir, filepath)
+        return filepath
+
+    def generate_many(self, reports: List[Dict[str, Any]], output_format: str, output_dir: str, preferences: Dict[str, str]) -> List[str]:
+        """
+        Genera varios reportes con el mismo formato y directorio de salida.
+        El escritor y el directorio se resuelven una sola vez para todo el lote.
+        """
+        extension, writer = self._resolve_writer(output_format)
+        self._ensure_output_dir(output_dir)
+
+        filepaths = []
+        for report_data in reports:
+            filepath = os.path.join(output_dir, f"sales_report_{report_data['user_id']}.{extension}")
+            self._write(writer, report_data, output_dir, filepath)
+            filepaths.append(filepath)
+        return filepaths
+
+    def _resolve_writer(self, output_format: str) -> Tuple[str, ReportWriter]:
+        """Devuelve la extensión normalizada y el escritor del formato pedido."""
+        extension = output_format.lower()
+        writer = self._writers.get(extension)
+
+        if not writer:
+            log.error(f"Formato de salida no soportado: {output_format}")
+            raise ValueError(f"Formato de salida no soportado: {output_format}")
+        return extension, writer
+
+    def _write(self, writer: ReportWriter, report_data: Dict[str, Any], output_dir: str, filepath: str):
+        """Escribe el reporte; si el directorio se borró después de crearlo, lo vuelve a crear."""
+        try:
+            writer.write(report_data, filepath)
+        except FileNotFoundError:
+            self._ensured_dirs.discard(output_dir)
+            self._ensure_output_dir(output_dir)
+            writer.write(report_data, filepath)
+
+    def _ensure_output_dir(self, output_dir: str):
+        """Crea el directorio de salida la primera vez que se usa en este generador."""
+        if output_dir in self._ensured_dirs:
+            return
+
         try:
             os.makedirs(output_dir, exist_ok=True)
         except OSError as e:
             raise IOError(f"No se pudo crear el directorio de salida {output_dir}: {e}")
-            
-        writer.write(report_data, filepath)
-        return filepath
+        self._ensured_dirs.add(output_dir)
@@ -1,6 +1,7 @@
 # sales_analyzer.py
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from pandas import DataFrame
 from data_loading import DataLoader
@@ -20,12 +21,19 @@ class SalesAnalyzer:
         'date_format': '%Y-%m-%d',
         'output_type': 'json'
     }
+    # Tope de hilos para la carga y la escritura concurrentes
+    MAX_WORKERS = 8
 
-    def __init__(self, data_loader: DataLoader, report_calculator: ReportCalculator, report_generator: ReportGenerator):
+    def __init__(self, data_loader: DataLoader, report_calculator: ReportCalculator, report_generator: ReportGenerator,
+                 parallel: bool = False, parallel_load: bool = False):
         # Nomenclatura mejorada: prefijos privados claros.
         self._data_loader = data_loader
         self._report_calculator = report_calculator
         self._report_generator = report_generator
+        # Escribe los reportes de distintos usuarios de forma concurrente (opcional, como la carga)
+        self._parallel = parallel
+        # Lee varios archivos de entrada de forma concurrente (los parsers en C liberan el GIL)
+        self._parallel_load = parallel_load
         
         self.sales_df: DataFrame = pd.DataFrame()
         self.calculated_reports: Dict[int, Dict[str, Any]] = {}
@@ -36,11 +44,14 @@ class SalesAnalyzer:
         Carga y consolida los datos de ventas de múltiples rutas de archivo.
         Separa la lógica de iteración de la lógica de carga unitaria.
         """
-        loaded_dfs: List[DataFrame] = []
-        for file_path in file_paths:
-            df = self._safe_load_single_file(file_path)
-            if df is not None:
-                loaded_dfs.append(df)
+        if self._parallel_load and len(file_paths) > 1:
+            # map conserva el orden de las rutas, por lo que la concatenación es la misma
+            with ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, len(file_paths))) as executor:
+                results = list(executor.map(self._safe_load_single_file, file_paths))
+        else:
+            results = [self._safe_load_single_file(file_path) for file_path in file_paths]
+
+        loaded_dfs: List[DataFrame] = [df for df in results if df is not None]
         
         if loaded_dfs:
             # Concatenación de DataFrames cargados
@@ -64,7 +75,18 @@ class SalesAnalyzer:
         Nombre de función mejorado para reflejar sus efectos secundarios (almacenamiento).
         """
         report_data = self._report_calculator.calculate_for_user(self.sales_df, user_id)
-        
+        return self._store_report(user_id, report_data)
+
+    def calculate_and_store_reports(self, user_ids: List[int]) -> List[int]:
+        """
+        Calcula y almacena los reportes de varios usuarios en una sola pasada sobre los datos.
+        Devuelve los usuarios cuyo reporte se almacenó.
+        """
+        reports = self._report_calculator.calculate_for_users(self.sales_df, user_ids)
+        return [user_id for user_id in user_ids if self._store_report(user_id, reports.get(user_id))]
+
+    def _store_report(self, user_id: int, report_data: Optional[Dict[str, Any]]) -> bool:
+        """Almacena el reporte calculado de un usuario o registra que no hubo datos."""
         if report_data:
             self.calculated_reports[user_id] = report_data
             logging.info(f"Reporte calculado y almacenado para el usuario {user_id}.")
@@ -81,13 +103,22 @@ class SalesAnalyzer:
             logging.warning("No hay usuarios para procesar. Calcule reportes primero.")
             return
 
+        pending = []
         for user_id in users_to_process:
             report_data = self.calculated_reports.get(user_id)
             if report_data is None:
                 logging.warning(f"Reporte para el usuario {user_id} no encontrado. Omitiendo generación.")
                 continue
             
-            self._safe_generate_single_report(user_id, report_data, output_dir)
+            pending.append((user_id, report_data))
+
+        # Los reportes son independientes entre sí, por lo que pueden escribirse en paralelo
+        if self._parallel and len(pending) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, len(pending))) as executor:
+                list(executor.map(lambda job: self._safe_generate_single_report(*job, output_dir), pending))
+        else:
+            for user_id, report_data in pending:
+                self._safe_generate_single_report(user_id, report_data, output_dir)
 
     def _safe_generate_single_report(self, user_id: int, report_data: Dict[str, Any], output_dir: str):
         """Extrae la responsabilidad del manejo de errores durante la generación del reporte."""
@@ -108,6 +139,9 @@ class SalesAnalyzer:
         for key, value in prefs.items():
             if key in self.user_prefs:
                 # Se podría añadir validación de tipos aquí, pero se mantiene simple
+                if key == 'output_type':
+                    # Se normaliza una sola vez aquí y no en cada reporte generado
+                    value = value.lower()
                 self.user_prefs[key] = value
                 logging.debug(f"Preferencia '{key}' actualizada a '{value}'")
             else:
@@ -121,7 +155,7 @@ if __name__ == "__main__":
     loader = DataLoader()
     calculator = ReportCalculator()
     generator = ReportGenerator()
-    system = SalesAnalyzer(loader, calculator, generator)
+    system = SalesAnalyzer(loader, calculator, generator, parallel_load=True)
     
     # 2. Ejecución del ejemplo de uso.
     try:
@@ -137,9 +171,8 @@ if __name__ == "__main__":
         )
         system.set_preferences(output_type='json', currency='EUR')
         
-        # Uso del nuevo nombre de función
-        system.calculate_and_store_report(42)
-        system.calculate_and_store_report(101)
+        # Cálculo en bloque: los datos se preparan una sola vez para todos los usuarios
+        system.calculate_and_store_reports([42, 101])
         
         system.generate_reports(output_directory, users=[42, 101])
         
@@ -3,6 +3,7 @@ import pytest
 import os
 import json
 import csv
+import datetime
 import pandas as pd
 from pandas.testing import assert_frame_equal
 from typing import List, Dict, Any, Callable
@@ -65,6 +66,14 @@ def test_json_reader_successful(create_temp_json):
     actual_df = reader.read(temp_file)
     assert_frame_equal(EXPECTED_DF_VALID_JSON, actual_df)
 
+def test_json_reader_without_orjson(create_temp_json, monkeypatch):
+    """Prueba que el lector JSON produzca el mismo resultado usando pd.read_json como respaldo."""
+    import data_loading
+    monkeypatch.setattr(data_loading, 'orjson', None)
+    temp_file = create_temp_json(TEST_DATA)
+    actual_df = JsonSalesReader().read(temp_file)
+    assert_frame_equal(EXPECTED_DF_VALID_JSON, actual_df)
+
 def test_csv_reader_successful(create_temp_csv):
     """Prueba la lectura exitosa de datos CSV válidos."""
     temp_file = create_temp_csv(TEST_DATA)
@@ -76,6 +85,38 @@ def test_csv_reader_successful(create_temp_csv):
     # es consistente con la capa de lectura.
     assert_frame_equal(EXPECTED_DF_VALID_CSV, actual_df, check_dtype=False)
 
+def test_csv_reader_pyarrow_requires_pyarrow(create_temp_csv, monkeypatch):
+    """Prueba que pedir el motor de pyarrow sin tenerlo instalado falle en vez de usar el motor C."""
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+    temp_file = create_temp_csv(TEST_DATA)
+    with pytest.raises(ImportError, match="pyarrow no está instalado"):
+        CsvSalesReader(use_pyarrow=True).read(temp_file)
+
+def test_csv_reader_default_engine_does_not_import_pyarrow(create_temp_csv, monkeypatch):
+    """Prueba que el motor C por defecto no necesite pyarrow."""
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+    temp_file = create_temp_csv(TEST_DATA)
+    actual_df = CsvSalesReader().read(temp_file)
+    assert_frame_equal(EXPECTED_DF_VALID_CSV, actual_df, check_dtype=False)
+
+def test_csv_reader_with_pyarrow_engine(create_temp_csv):
+    """Prueba la lectura real con el motor de pyarrow: 'date' llega como datetime.date."""
+    pytest.importorskip("pyarrow")
+    temp_file = create_temp_csv(TEST_DATA)
+    actual_df = CsvSalesReader(use_pyarrow=True).read(temp_file)
+
+    assert all(isinstance(value, datetime.date) for value in actual_df['date'])
+    actual_df['date'] = actual_df['date'].astype(str)
+    assert_frame_equal(EXPECTED_DF_VALID_CSV, actual_df, check_dtype=False)
+
+def test_data_loader_pyarrow_csv_option(create_temp_csv):
+    """Prueba que DataLoader permita activar el motor de pyarrow para los CSV."""
+    pytest.importorskip("pyarrow")
+    temp_file = str(create_temp_csv(TEST_DATA))
+
+    assert isinstance(DataLoader(use_pyarrow_csv=True).load_from_file(temp_file)['date'][0], datetime.date)
+    assert isinstance(DataLoader().load_from_file(temp_file)['date'][0], str)
+
 def test_json_reader_invalid_content(create_temp_json):
     """Prueba que el lector JSON levante ValueError con contenido inválido (no es una lista de registros)."""
     # Intentamos crear un JSON inválido (un string simple en lugar de una lista de registros)
@@ -3,8 +3,10 @@ import pytest
 import os
 import json
 import csv
+import shutil
+import numpy as np
 import pandas as pd
-from typing import Dict, Any, List
+from typing import Dict, Any
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
@@ -15,18 +17,20 @@ from reporting import ReportCalculator, ReportGenerator, JsonReportWriter, CsvRe
 
 # DataFrame de ventas limpio y listo para ser procesado.
 # Simula la salida de la función _process_and_enrich_data de ReportCalculator.
-TEST_SALES_DATA: List[Dict[str, Any]] = [
-    # Usuario 42: Enero 2025, Febrero 2025
-    {'user_id': 42, 'date': pd.Timestamp('2025-01-10'), 'price': 100.0, 'quantity': 2, 'category': 'A', 'total_sale': 200.0, 'year': 2025, 'month': 1, 'month_name': '2025-01'},
-    {'user_id': 42, 'date': pd.Timestamp('2025-01-15'), 'price': 50.0, 'quantity': 1, 'category': 'B', 'total_sale': 50.0, 'year': 2025, 'month': 1, 'month_name': '2025-01'},
-    {'user_id': 42, 'date': pd.Timestamp('2025-02-01'), 'price': 150.0, 'quantity': 3, 'category': 'A', 'total_sale': 450.0, 'year': 2025, 'month': 2, 'month_name': '2025-02'},
-    
-    # Usuario 101: Febrero 2025
-    {'user_id': 101, 'date': pd.Timestamp('2025-02-20'), 'price': 200.0, 'quantity': 1, 'category': 'C', 'total_sale': 200.0, 'year': 2025, 'month': 2, 'month_name': '2025-02'},
-]
-
-# DataFrame base con los tipos correctos
-TEST_DF = pd.DataFrame(TEST_SALES_DATA)
+# Se construye por columnas con los tipos ya definidos (sin inferencia fila a fila), de modo
+# que las pruebas ejercitan el camino rápido para columnas ya tipadas.
+# Usuario 42: Enero 2025 (2 ventas), Febrero 2025 (1 venta). Usuario 101: Febrero 2025.
+TEST_DF = pd.DataFrame({
+    'user_id': np.array([42, 42, 42, 101], dtype='int64'),
+    'date': pd.to_datetime(['2025-01-10', '2025-01-15', '2025-02-01', '2025-02-20']),
+    'price': np.array([100.0, 50.0, 150.0, 200.0]),
+    'quantity': np.array([2, 1, 3, 1], dtype='int64'),
+    'category': pd.Categorical(['A', 'B', 'A', 'C']),
+    'total_sale': np.array([200.0, 50.0, 450.0, 200.0]),
+    'year': np.full(4, 2025, dtype='int64'),
+    'month': np.array([1, 1, 2, 2], dtype='int64'),
+    'month_name': pd.Categorical(['2025-01', '2025-01', '2025-02', '2025-02']),
+})
 
 # Diccionario de reporte esperado para el Usuario 42 (Base para comparación)
 EXPECTED_REPORT_42: Dict[str, Any] = {
@@ -130,6 +134,72 @@ class TestReportCalculator:
         report = calculator.calculate_for_user(empty_df, 42)
         assert report is None
 
+    def test_calculate_for_users_skips_users_without_sales(self, calculator):
+        """Prueba el cálculo en bloque: coincide con el cálculo individual y omite usuarios sin ventas."""
+        reports = calculator.calculate_for_users(TEST_DF, [42, 101, 999])
+
+        assert set(reports) == {42, 101}
+        assert reports[42]['monthly'] == calculator.calculate_for_user(TEST_DF, 42)['monthly']
+
+    def test_precompute_reuses_enriched_dataframe(self, calculator):
+        """Prueba que el DataFrame enriquecido se calcule una sola vez por DataFrame de origen."""
+        first = calculator.precompute(TEST_DF)
+        calculator.calculate_for_user(TEST_DF, 42)
+        second = calculator.precompute(TEST_DF)
+        assert first is second
+        # El cálculo por usuario no agrega columnas auxiliares al DataFrame compartido
+        assert 'period' not in second.columns
+
+        # Un DataFrame distinto invalida la cache
+        assert calculator.precompute(TEST_DF.copy()) is not first
+
+    def test_precompute_invalidates_when_shape_or_dtypes_change(self, calculator):
+        """Prueba que agregar filas o cambiar tipos en el mismo objeto invalide la cache."""
+        sales_df = TEST_DF.copy()
+        first = calculator.calculate_for_user(sales_df, 101)
+
+        sales_df.loc[len(sales_df)] = sales_df.iloc[-1]
+        second = calculator.calculate_for_user(sales_df, 101)
+        assert second['yearly']['2025']['count'] == first['yearly']['2025']['count'] + 1
+
+        sales_df['price'] = sales_df['price'].astype(str)
+        assert calculator.calculate_for_user(sales_df, 101)['monthly'] is not second['monthly']
+
+    def test_calculate_for_user_reuses_cached_report(self, calculator):
+        """Prueba que un usuario ya calculado se reutilice, renovando solo 'generated_at'."""
+        first = calculator.calculate_for_user(TEST_DF, 42)
+        second = calculator.calculate_for_user(TEST_DF, 42)
+        assert second is not first
+        assert second['monthly'] == first['monthly']
+        assert second['yearly'] == first['yearly']
+        assert list(second) == list(first)
+
+        # Un DataFrame distinto invalida los reportes guardados
+        cached = calculator._report_cache[42]
+        calculator.calculate_for_user(TEST_DF.copy(), 42)
+        assert calculator._report_cache[42] is not cached
+
+    def test_calculate_for_user_returns_independent_copies(self, calculator):
+        """Prueba que modificar un reporte devuelto no altere los reportes guardados."""
+        first = calculator.calculate_for_user(TEST_DF, 42)
+        expected = ReportCalculator().calculate_for_user(TEST_DF, 42)
+
+        month = next(iter(first['monthly']))
+        first['monthly'][month]['total'] = -1
+        first['monthly'][month]['items'][0]['price'] = -1
+        first['monthly'][month]['items'].clear()
+        first['yearly'].clear()
+
+        again = calculator.calculate_for_user(TEST_DF, 42)
+        assert again['monthly'] == expected['monthly']
+        assert again['yearly'] == expected['yearly']
+
+    def test_calculate_for_user_does_not_modify_input(self, calculator):
+        """Prueba que el cálculo no altere el DataFrame recibido."""
+        original = TEST_DF.copy()
+        calculator.calculate_for_user(TEST_DF, 42)
+        pd.testing.assert_frame_equal(TEST_DF, original)
+
     def test_prepare_dataframe_cleans_types(self, calculator):
         """Prueba que la función de preparación de datos convierte tipos correctamente."""
         # Datos con strings que deben ser convertidos
@@ -153,6 +223,46 @@ class TestReportCalculator:
         # 2. Verificar columna calculada
         assert processed_df['total_sale'].iloc[0] == 10.0
 
+    def test_prepare_dataframe_skips_conversion_for_typed_columns(self, calculator, monkeypatch):
+        """Prueba que las columnas que ya tienen el tipo esperado no se vuelvan a convertir."""
+        def fail(*args, **kwargs):
+            raise AssertionError("no debería convertirse una columna ya tipada")
+        monkeypatch.setattr(pd, 'to_numeric', fail)
+        monkeypatch.setattr(pd, 'to_datetime', fail)
+
+        processed_df = calculator._process_and_enrich_data(TEST_DF)
+
+        assert len(processed_df) == len(TEST_DF)
+        assert processed_df['date'].dtype == 'datetime64[ns]'
+        assert processed_df['total_sale'].tolist() == TEST_DF['total_sale'].tolist()
+
+    def test_calculate_for_user_with_timezone_dates(self, calculator):
+        """Prueba que las fechas con zona horaria ('Z' o '+00:00') se agrupen por su mes local."""
+        raw_data = pd.DataFrame([
+            {'user_id': 7, 'date': '2025-01-31T23:30:00Z', 'price': 10.0, 'quantity': 1},
+            {'user_id': 7, 'date': '2025-02-10T10:00:00Z', 'price': 20.0, 'quantity': 2},
+        ])
+
+        report = calculator.calculate_for_user(raw_data, 7)
+
+        assert report['monthly']['2025-01']['total'] == pytest.approx(10.0)
+        assert report['monthly']['2025-01']['items'][0]['date'] == '2025-01-31'
+        assert report['monthly']['2025-02']['total'] == pytest.approx(40.0)
+        assert report['yearly']['2025']['count'] == 2
+
+    def test_prepare_dataframe_restores_integer_columns(self, calculator):
+        """Prueba que user_id y quantity vuelvan a int64 tras descartar filas inválidas."""
+        raw_data = pd.DataFrame([
+            {'user_id': '1', 'date': '2024-01-01', 'price': '5.0', 'quantity': '2'},
+            {'user_id': 'bad_id', 'date': '2024-01-02', 'price': '5.0', 'quantity': 'bad_qty'},
+        ])
+
+        processed_df = calculator._process_and_enrich_data(raw_data)
+
+        assert len(processed_df) == 1
+        assert processed_df['user_id'].dtype == 'int64'
+        assert processed_df['quantity'].dtype == 'int64'
+
     def test_prepare_dataframe_handles_bad_data(self, calculator):
         """Prueba que el preparador maneje datos no numéricos (NaN/NaT)."""
         raw_data = pd.DataFrame([{
@@ -249,6 +359,56 @@ class TestReportGeneratorAndWriters:
         # Verificar que el directorio y subdirectorio se hayan creado
         assert os.path.isdir(non_existent_dir)
 
+    def test_generator_creates_output_dir_once(self, generator, tmp_path, monkeypatch):
+        """Prueba que el directorio de salida se cree una sola vez para varios reportes."""
+        output_dir = str(tmp_path / "reports")
+        makedirs_calls = []
+        real_makedirs = os.makedirs
+        monkeypatch.setattr(os, 'makedirs', lambda *args, **kwargs: makedirs_calls.append(args) or real_makedirs(*args, **kwargs))
+
+        generator.generate(GENERATOR_REPORT_DATA, 'json', output_dir, preferences={})
+        generator.generate(GENERATOR_REPORT_DATA, 'csv', output_dir, preferences={})
+
+        assert len(makedirs_calls) == 1
+
+    def test_generator_recreates_removed_output_dir(self, generator, tmp_path):
+        """Prueba que un generador reutilizado vuelva a crear el directorio si se borró entre lotes."""
+        output_dir = str(tmp_path / "reports")
+        generator.generate(GENERATOR_REPORT_DATA, 'json', output_dir, preferences={})
+        shutil.rmtree(output_dir)
+
+        filepath = generator.generate(GENERATOR_REPORT_DATA, 'json', output_dir, preferences={})
+        assert os.path.exists(filepath)
+
+        shutil.rmtree(output_dir)
+        filepaths = generator.generate_many([GENERATOR_REPORT_DATA], 'csv', output_dir, preferences={})
+        assert os.path.exists(filepaths[0])
+
+    def test_generator_generate_many(self, generator, tmp_path):
+        """Prueba que generate_many escriba el mismo archivo que generate para cada reporte."""
+        output_dir = str(tmp_path / "reports")
+        other_report = {**GENERATOR_REPORT_DATA, 'user_id': 101}
+
+        filepaths = generator.generate_many([GENERATOR_REPORT_DATA, other_report], 'CSV', output_dir, preferences={})
+
+        assert filepaths == [
+            os.path.join(output_dir, f"sales_report_{GENERATOR_REPORT_DATA['user_id']}.csv"),
+            os.path.join(output_dir, "sales_report_101.csv"),
+        ]
+        for report_data, filepath in zip([GENERATOR_REPORT_DATA, other_report], filepaths):
+            with open(filepath, 'rb') as f:
+                assert f.read() == CsvReportWriter().serialize(report_data)
+
+        with pytest.raises(ValueError, match="Formato de salida no soportado"):
+            generator.generate_many([GENERATOR_REPORT_DATA], 'xml', output_dir, preferences={})
+
+    def test_writer_serialize_matches_written_file(self, tmp_path):
+        """Prueba que el archivo escrito contenga exactamente el contenido serializado."""
+        for writer in (JsonReportWriter(), CsvReportWriter()):
+            filepath = tmp_path / "report.out"
+            writer.write(GENERATOR_REPORT_DATA, str(filepath))
+            assert filepath.read_bytes() == writer.serialize(GENERATOR_REPORT_DATA)
+
     def test_csv_writer_zero_average_format(self, tmp_path):
         """Prueba que el CSV Writer formatee el promedio a 0.00 cuando no hay ventas (count=0)."""
         writer = CsvReportWriter()
@@ -70,6 +70,11 @@ class TestSalesAnalyzer:
         # Assert - El sales_df interno debe contener los datos combinados
         pd.testing.assert_frame_equal(analyzer.sales_df, EXPECTED_MERGED_DF)
 
+    def test_load_data_does_not_touch_calculator(self, analyzer, mock_report_calculator):
+        """Prueba que la carga no limpie ni enriquezca los datos: eso ocurre al calcular reportes."""
+        analyzer.load_data('file1.json', 'file2.csv')
+        assert mock_report_calculator.mock_calls == []
+
     def test_load_data_with_loading_errors(self, analyzer, mock_data_loader, caplog):
         """Prueba que los errores de carga se manejen (loggeen) y la carga continúe."""
         # Configurar el mock para que falle la primera carga y tenga éxito la segunda
@@ -85,6 +90,17 @@ class TestSalesAnalyzer:
         # Assert - El DF debe contener solo los datos del archivo exitoso
         pd.testing.assert_frame_equal(analyzer.sales_df, DUMMY_DF_2.reset_index(drop=True))
 
+    def test_load_data_parallel_keeps_file_order(self, mock_data_loader, mock_report_calculator, mock_report_generator):
+        """Prueba que la carga concurrente concatene los archivos en el orden recibido."""
+        mock_data_loader.load_from_file.side_effect = {'file1.json': DUMMY_DF_1, 'file2.csv': DUMMY_DF_2}.get
+        analyzer = SalesAnalyzer(mock_data_loader, mock_report_calculator, mock_report_generator, parallel_load=True)
+
+        # Act
+        analyzer.load_data('file1.json', 'file2.csv')
+
+        # Assert
+        pd.testing.assert_frame_equal(analyzer.sales_df, EXPECTED_MERGED_DF)
+
     def test_load_data_no_files(self, analyzer):
         """Prueba que el DF interno permanezca vacío si no se proporcionan rutas."""
         analyzer.sales_df = pd.DataFrame() 
@@ -105,6 +121,11 @@ class TestSalesAnalyzer:
         assert analyzer.user_prefs['currency'] == 'EUR'
         assert analyzer.user_prefs['output_type'] == 'csv'
         
+    def test_set_preferences_normalizes_output_type(self, analyzer):
+        """Prueba que el formato de salida se normalice a minúsculas al configurarlo."""
+        analyzer.set_preferences(output_type='CSV')
+        assert analyzer.user_prefs['output_type'] == 'csv'
+
     def test_set_preferences_unknown_ignored(self, analyzer, caplog):
         """Prueba que las preferencias desconocidas sean ignoradas y loggeadas."""
         
@@ -154,6 +175,19 @@ class TestSalesAnalyzer:
         # Assert - Debe haber un log de información
         assert "No se encontraron datos de ventas válidos para el usuario 99" in caplog.text
 
+    def test_calculate_and_store_reports_bulk(self, analyzer, mock_report_calculator):
+        """Prueba el cálculo en bloque: una sola llamada al calculador para todos los usuarios."""
+        analyzer.sales_df = EXPECTED_MERGED_DF.copy()
+        mock_report_calculator.calculate_for_users.return_value = {42: DUMMY_REPORT_42}
+
+        # Act
+        stored = analyzer.calculate_and_store_reports([42, 99])
+
+        # Assert
+        mock_report_calculator.calculate_for_users.assert_called_once_with(analyzer.sales_df, [42, 99])
+        assert stored == [42]
+        assert analyzer.calculated_reports == {42: DUMMY_REPORT_42}
+
     # --- Pruebas para generate_reports ---
     
     def test_generate_reports_successful(self, analyzer, mock_report_generator):
@@ -181,6 +215,53 @@ class TestSalesAnalyzer:
         mock_report_generator.generate.assert_has_calls(expected_calls, any_order=True)
         assert mock_report_generator.generate.call_count == 2
 
+    def test_generate_reports_sequential_keeps_order(self, mock_data_loader, mock_report_calculator, mock_report_generator):
+        """Prueba que con parallel=False los reportes se generen en el orden solicitado."""
+        analyzer = SalesAnalyzer(mock_data_loader, mock_report_calculator, mock_report_generator, parallel=False)
+        analyzer.calculated_reports = {
+            42: DUMMY_REPORT_42,
+            101: DUMMY_REPORT_101
+        }
+        OUTPUT_DIR = '/mock/reports'
+
+        # Act
+        analyzer.generate_reports(OUTPUT_DIR, users=[101, 42])
+
+        # Assert
+        assert mock_report_generator.generate.call_args_list == [
+            call(DUMMY_REPORT_101, 'json', OUTPUT_DIR, analyzer.user_prefs),
+            call(DUMMY_REPORT_42, 'json', OUTPUT_DIR, analyzer.user_prefs),
+        ]
+
+    def test_generate_reports_parallel_bounds_workers(self, mock_data_loader, mock_report_calculator, mock_report_generator, monkeypatch):
+        """Prueba que con parallel=True se escriban todos los reportes con un número acotado de hilos."""
+        import sales_analyzer
+        pool_sizes = []
+        real_executor = sales_analyzer.ThreadPoolExecutor
+
+        def recording_executor(max_workers=None):
+            pool_sizes.append(max_workers)
+            return real_executor(max_workers=max_workers)
+
+        monkeypatch.setattr(sales_analyzer, 'ThreadPoolExecutor', recording_executor)
+        analyzer = SalesAnalyzer(mock_data_loader, mock_report_calculator, mock_report_generator, parallel=True)
+        analyzer.calculated_reports = {
+            42: DUMMY_REPORT_42,
+            101: DUMMY_REPORT_101
+        }
+        OUTPUT_DIR = '/mock/reports'
+
+        # Act
+        analyzer.generate_reports(OUTPUT_DIR, users=[42, 101])
+
+        # Assert
+        assert pool_sizes == [2]
+        mock_report_generator.generate.assert_has_calls([
+            call(DUMMY_REPORT_42, 'json', OUTPUT_DIR, analyzer.user_prefs),
+            call(DUMMY_REPORT_101, 'json', OUTPUT_DIR, analyzer.user_prefs),
+        ], any_order=True)
+        assert mock_report_generator.generate.call_count == 2
+
     def test_generate_reports_skips_uncalculated(self, analyzer, mock_report_generator, caplog):
         """Prueba que el generador salte a los usuarios sin reportes calculados."""
         